@@ -4,19 +4,31 @@ A FastAPI backend for voice-to-voice AI interactions with the Aman Sharma person
 """
 
 import os
+import re
+import json
 import time
+import random
+import asyncio
+import hashlib
 import logging
-from datetime import datetime
-from typing import Optional, Dict, Any
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, AsyncIterator
+from functools import lru_cache
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Request
+import orjson
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, validator
+from fastapi.responses import JSONResponse, StreamingResponse
+import httpx
+import redis.asyncio as aioredis
+from pydantic import BaseModel, Field, field_validator
 from google import genai
-from openai import OpenAI
-from groq import Groq
+from google.genai import types as genai_types
+import openai
+import groq
+from openai import AsyncOpenAI
+from groq import AsyncGroq
 from dotenv import load_dotenv
 
 # Configure logging
@@ -36,11 +48,41 @@ class Config:
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+    REDIS_URL = os.getenv("REDIS_URL")
+
+    # CORS Settings (comma-separated origins; the deployed frontend origin
+    # must be listed via the ALLOWED_ORIGINS env var)
+    ALLOWED_ORIGINS = [
+        origin.strip()
+        for origin in os.getenv(
+            "ALLOWED_ORIGINS",
+            "http://localhost:8000,http://127.0.0.1:8000",
+        ).split(",")
+        if origin.strip()
+    ]
+
+    # Logging Settings (uvicorn's access log already covers per-request lines)
+    LOG_REQUESTS = os.getenv("LOG_REQUESTS", "").lower() in ("1", "true", "yes")
+
+    # Cache Settings
+    CACHE_TTL = 3600  # seconds
+    USE_CANNED = os.getenv("USE_CANNED", "1").lower() in ("1", "true", "yes")
 
     # API Settings
-    MAX_RETRIES = 3
-    RETRY_DELAY = 1  # seconds
-    REQUEST_TIMEOUT = 30  # seconds
+    MAX_RETRIES = 2
+    MAX_BACKOFF = 8  # seconds
+    REQUEST_TIMEOUT = 10  # seconds
+
+    # Hedging Settings (0 disables hedging and restores sequential fallback)
+    HEDGE_DELAY_MS = int(os.getenv("HEDGE_DELAY_MS", "400"))
+
+    # Batching Settings (0 disables micro-batching of concurrent questions)
+    BATCH_WINDOW_MS = int(os.getenv("BATCH_WINDOW_MS", "20"))
+    BATCH_MAX = 8
+
+    # HTTP Connection Pool Settings
+    MAX_CONNECTIONS = 200
+    MAX_KEEPALIVE_CONNECTIONS = 100
 
     # Response Settings
     MAX_TOKENS = 200
@@ -54,31 +96,55 @@ class Config:
 
 # Initialize API clients
 gemini_client: Optional[genai.Client] = None
-openai_client: Optional[OpenAI] = None
-groq_client: Optional[Groq] = None
+openai_client: Optional[AsyncOpenAI] = None
+groq_client: Optional[AsyncGroq] = None
+shared_http: Optional[httpx.AsyncClient] = None
+redis_client: Optional[aioredis.Redis] = None
+batcher: Optional["Batcher"] = None
+
+# (name, coroutine) pairs in priority order, built once at startup so the
+# request path iterates a constant tuple instead of re-checking each client.
+PROVIDERS: tuple = ()
+STREAM_PROVIDERS: tuple = ()
 
+# Cache metrics
+cache_hits = 0
+cache_misses = 0
 
-def initialize_clients():
+
+def initialize_clients(http_client: Optional[httpx.AsyncClient] = None):
     """Initialize AI service clients with proper error handling."""
     global gemini_client, openai_client, groq_client
 
     if Config.GEMINI_API_KEY:
         try:
-            gemini_client = genai.Client(api_key=Config.GEMINI_API_KEY)
+            # The genai SDK builds its own async transport, so pass pool
+            # settings through instead of injecting the shared client.
+            gemini_client = genai.Client(
+                api_key=Config.GEMINI_API_KEY,
+                http_options=genai_types.HttpOptions(
+                    async_client_args={
+                        "limits": httpx.Limits(
+                            max_connections=Config.MAX_CONNECTIONS,
+                            max_keepalive_connections=Config.MAX_KEEPALIVE_CONNECTIONS,
+                        ),
+                    },
+                ),
+            )
             logger.info("Gemini client initialized successfully")
         except Exception as e:
             logger.warning(f"Gemini client initialization failed: {e}")
 
     if Config.OPENAI_API_KEY:
         try:
-            openai_client = OpenAI(api_key=Config.OPENAI_API_KEY)
+            openai_client = AsyncOpenAI(api_key=Config.OPENAI_API_KEY, http_client=http_client)
             logger.info("OpenAI client initialized successfully")
         except Exception as e:
             logger.warning(f"OpenAI client initialization failed: {e}")
 
     if Config.GROQ_API_KEY:
         try:
-            groq_client = Groq(api_key=Config.GROQ_API_KEY)
+            groq_client = AsyncGroq(api_key=Config.GROQ_API_KEY, http_client=http_client)
             logger.info("Groq client initialized successfully")
         except Exception as e:
             logger.warning(f"Groq client initialization failed: {e}")
@@ -87,35 +153,79 @@ def initialize_clients():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
+    global shared_http, redis_client, batcher, PROVIDERS, STREAM_PROVIDERS
+
     logger.info("Starting VoiceMe backend")
-    initialize_clients()
+    if Config.REDIS_URL:
+        try:
+            redis_client = aioredis.from_url(Config.REDIS_URL, decode_responses=True)
+            logger.info("Redis cache client initialized successfully")
+        except Exception as e:
+            logger.warning(f"Redis cache initialization failed: {e}")
+    shared_http = httpx.AsyncClient(
+        http2=True,
+        timeout=Config.REQUEST_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=Config.MAX_CONNECTIONS,
+            max_keepalive_connections=Config.MAX_KEEPALIVE_CONNECTIONS,
+        ),
+    )
+    initialize_clients(shared_http)
+    PROVIDERS = tuple(
+        (name, call)
+        for name, client, call in (
+            ("gemini", gemini_client, call_gemini),
+            ("openai", openai_client, call_openai),
+            ("groq", groq_client, call_groq),
+        )
+        if client
+    )
+    STREAM_PROVIDERS = tuple(
+        (name, stream)
+        for name, client, stream in (
+            ("gemini", gemini_client, stream_gemini),
+            ("openai", openai_client, stream_openai),
+            ("groq", groq_client, stream_groq),
+        )
+        if client
+    )
+    if Config.BATCH_WINDOW_MS > 0:
+        batcher = Batcher(Config.BATCH_WINDOW_MS / 1000, Config.BATCH_MAX)
+        batcher.start()
     logger.info("VoiceMe backend started successfully")
     yield
     logger.info("Shutting down VoiceMe backend")
+    if batcher:
+        await batcher.stop()
+    await shared_http.aclose()
+    if redis_client:
+        await redis_client.aclose()
 
 
 app = FastAPI(
     title="VoiceMe API",
     description="AI Interview Voice Agent Backend",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
 )
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=Config.ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type"],
+    max_age=86400,
 )
 
 
 class QuestionRequest(BaseModel):
     """Request model for asking questions."""
 
-    question: str = Field(..., min_length=1, max_length=1000, description="The question to ask")
+    question: str = Field(..., min_length=1, max_length=500, description="The question to ask")
 
-    @validator("question")
+    @field_validator("question")
+    @classmethod
     def question_must_not_be_empty(cls, value):
         if not value.strip():
             raise ValueError("Question cannot be empty or whitespace")
@@ -136,6 +246,7 @@ class HealthResponse(BaseModel):
 
     status: str
     services_available: Dict[str, bool]
+    cache_stats: Dict[str, int]
     timestamp: str
 
 
@@ -263,36 +374,68 @@ CONSTRAINTS
 - Keep answers grounded in real experience and the profile above
 - If asked for facts not present here, do not fabricate them
 - Max response length unless required: about 80 to 120 words
-"""
+""".strip()
+
+# Precomputed per-provider prompt pieces so the hot path does not rebuild them
+_SYSTEM_MSG = {"role": "system", "content": SYSTEM_PROMPT}
+_GEMINI_PREFIX = SYSTEM_PROMPT + "\n\n"
+@lru_cache(maxsize=None)
+def _gemini_config(max_tokens: int) -> genai_types.GenerateContentConfig:
+    """Generation config per output budget; cached since only a few sizes occur."""
+    return genai_types.GenerateContentConfig(
+        max_output_tokens=max_tokens,
+        temperature=Config.TEMPERATURE,
+        stop_sequences=["\nUser Question:", "\n\n\n"],
+    )
+
+
+# The root payload never changes, so it is serialized once at import time.
+_ROOT_BYTES = orjson.dumps({
+    "name": "VoiceMe API",
+    "version": "2.0.0",
+    "status": "operational",
+    "endpoints": {
+        "health": "/health",
+        "ask": "/ask",
+        "docs": "/docs",
+    },
+})
+
+# Load balancers poll /health at 1+ Hz; the rendered body is reused for 5 s.
+_health_cache = {"built_at": 0.0, "body": b""}
 
 
 @app.get("/", response_model=Dict[str, Any])
 async def root():
     """Root endpoint with API information."""
-    return {
-        "name": "VoiceMe API",
-        "version": "2.0.0",
-        "status": "operational",
-        "endpoints": {
-            "health": "/health",
-            "ask": "/ask",
-            "docs": "/docs",
-        },
-    }
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint."""
-    return HealthResponse(
-        status="healthy",
-        services_available={
-            "gemini": gemini_client is not None,
-            "openai": openai_client is not None,
-            "groq": groq_client is not None,
-        },
-        timestamp=datetime.now().isoformat(),
-    )
+    now = time.time()
+    if now - _health_cache["built_at"] > 5:
+        # Plain dict rather than a HealthResponse instance; the model only
+        # documents the schema, so skip its validation on rebuilds.
+        _health_cache["body"] = orjson.dumps({
+            "status": "healthy",
+            "services_available": {
+                "gemini": gemini_client is not None,
+                "openai": openai_client is not None,
+                "groq": groq_client is not None,
+            },
+            "cache_stats": {"hits": cache_hits, "misses": cache_misses},
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        })
+        _health_cache["built_at"] = now
+    return Response(content=_health_cache["body"], media_type="application/json")
+
+
+@app.options("/ask", include_in_schema=False)
+async def ask_options():
+    """Fast path for non-CORS OPTIONS probes; preflights stay in the middleware."""
+    return Response(status_code=204)
 
 
 @app.post("/ask", response_model=AnswerResponse)
@@ -303,12 +446,41 @@ async def ask_question(request: QuestionRequest, http_request: Request) -> Answe
     Tries Gemini first, then falls back to OpenAI, then Groq if previous attempts fail.
     Includes retry logic and proper error handling.
     """
+    global cache_hits, cache_misses
+
     del http_request
     start_time = time.time()
     logger.info(f"Received question: {request.question[:50]}...")
 
-    full_prompt = build_full_prompt(request.question)
-    result = try_all_services(full_prompt)
+    if Config.USE_CANNED:
+        canned = CANNED_ANSWERS.get(normalize_question(request.question))
+        if canned is not None:
+            logger.info("Canned answer hit")
+            return AnswerResponse(
+                answer=canned,
+                model_used="canned",
+                response_time=round(time.time() - start_time, 2),
+                timestamp=datetime.now().isoformat(),
+            )
+
+    cache_key = build_cache_key(request.question)
+    cached = await cache_get(cache_key)
+    if cached is not None:
+        cache_hits += 1
+        response_time = time.time() - start_time
+        logger.info(f"Cache hit ({cache_hits} hits / {cache_misses} misses)")
+        return AnswerResponse(
+            answer=cached,
+            model_used="cache",
+            response_time=round(response_time, 2),
+            timestamp=datetime.now().isoformat(),
+        )
+    cache_misses += 1
+
+    if batcher:
+        result = await batcher.submit(request.question)
+    else:
+        result = await try_all_services(build_full_prompt(request.question))
 
     if result is None:
         logger.error("All AI services failed")
@@ -317,6 +489,8 @@ async def ask_question(request: QuestionRequest, http_request: Request) -> Answe
             detail="All AI services are currently unavailable. Please try again later."
         )
 
+    await cache_set(cache_key, result["answer"])
+
     response_time = time.time() - start_time
     logger.info(f"Response generated in {response_time:.2f}s using {result['model']}")
 
@@ -328,62 +502,341 @@ async def ask_question(request: QuestionRequest, http_request: Request) -> Answe
     )
 
 
+@app.post("/ask/stream")
+async def ask_question_stream(request: QuestionRequest, http_request: Request) -> StreamingResponse:
+    """
+    Ask a question and stream the AI response as Server-Sent Events.
+
+    Tokens arrive as soon as the model produces them, so the frontend can start
+    text-to-speech on first-token latency instead of full-response latency.
+    Providers are tried in the same priority order as `/ask`, but fallback only
+    happens before the first token -- a stream cannot switch models midway.
+    """
+    del http_request
+    logger.info(f"Received streaming question: {request.question[:50]}...")
+
+    full_prompt = build_full_prompt(request.question)
+    return StreamingResponse(
+        stream_all_services(full_prompt),
+        media_type="text/event-stream",
+    )
+
+
+# Hand-authored answers for the canonical interview questions from the
+# SYSTEM_PROMPT guidance -- these skip the LLM round-trip entirely. Keys are
+# normalized via normalize_question.
+CANNED_ANSWERS = {
+    "tell me about yourself": (
+        "I'm Aman Sharma, a software engineer and BTech student at IIT (ISM) Dhanbad, "
+        "graduating in 2026. I got into engineering through competitive programming -- "
+        "I'm a Codeforces Expert -- and that pushed me toward building real systems. "
+        "I've done full-stack work with React and Node at Grull Technologies, and I'm "
+        "currently interning at Infosys. What drives me is taking a hard problem, "
+        "breaking it down to first principles, and shipping something practical."
+    ),
+    "whats your 1 superpower": (
+        "Learning fast. I can pick up an unfamiliar stack or problem domain, strip it "
+        "down to first principles, and get productive quickly. Competitive programming "
+        "trained that muscle -- under time pressure you learn to see the simple core of "
+        "a complex problem, and I apply the same approach to real engineering work."
+    ),
+    "what are areas you want to grow in": (
+        "Three things, mainly. I want to go deeper into system design and distributed "
+        "systems -- building things that stay reliable at scale. I'm also investing in "
+        "AI agents, since I've contributed to a multi-agent framework and want to push "
+        "further there. And I want to get better at communicating technical ideas to "
+        "larger audiences, not just small teams."
+    ),
+    "what misconception do people have about you": (
+        "People sometimes read my quietness as disengagement. In reality, when I'm calm "
+        "in a discussion it's usually because I'm observing and processing -- I'd rather "
+        "think a problem through and say something useful than fill the silence. Once "
+        "I've worked it out, I'm happy to argue for an approach in detail."
+    ),
+    "how do you push your limits": (
+        "I deliberately put myself in situations slightly beyond my current level. "
+        "Competitive programming does that constantly -- you fail until you level up. "
+        "I do the same with projects: picking work that needs tools I haven't used yet, "
+        "like building an audio classification system or contributing to a multi-agent "
+        "framework, and learning whatever the problem demands."
+    ),
+}
+
+
+@lru_cache(maxsize=1024)
+def normalize_question(question: str) -> str:
+    """Normalize a question to its semantic key for canned-answer lookup."""
+    key = re.sub(r"[^a-z0-9 ]", "", question.lower())
+    return re.sub(r"\s+", " ", key).strip()
+
+
+def build_cache_key(question: str) -> str:
+    """
+    Build a deterministic cache key for a question.
+
+    Keyed on (model, normalized question) only -- the timestamp added by
+    `build_full_prompt` is deliberately excluded so repeated questions collide.
+    """
+    normalized = question.strip().lower()
+    return hashlib.sha256(f"{Config.GEMINI_MODEL}|{normalized}".encode()).hexdigest()
+
+
+async def cache_get(key: str) -> Optional[str]:
+    """Read a cached answer, treating any Redis failure as a miss."""
+    if redis_client is None:
+        return None
+    try:
+        return await redis_client.get(key)
+    except Exception as e:
+        logger.warning(f"Redis cache read failed: {e}")
+        return None
+
+
+async def cache_set(key: str, answer: str):
+    """Store an answer in the cache, ignoring Redis failures."""
+    if redis_client is None:
+        return
+    try:
+        await redis_client.setex(key, Config.CACHE_TTL, answer)
+    except Exception as e:
+        logger.warning(f"Redis cache write failed: {e}")
+
+
+# strftime is slow and the prompt only carries minute resolution, so the
+# formatted timestamp is refreshed at most once per minute.
+_time_cache = {"refreshed_at": 0.0, "formatted": ""}
+
+
 def build_full_prompt(question: str) -> str:
     """Build the full prompt with context."""
-    current_time = datetime.now().strftime("%A, %B %d, %Y %H:%M")
-    return f"""Current Date and Time: {current_time}
+    now = time.time()
+    if now - _time_cache["refreshed_at"] > 60:
+        _time_cache["formatted"] = datetime.now().strftime("%A, %B %d, %Y %H:%M")
+        _time_cache["refreshed_at"] = now
+    return f"""Current Date and Time: {_time_cache['formatted']}
 
 User Question: {question}"""
 
 
-def try_all_services(prompt: str) -> Optional[Dict[str, str]]:
+async def try_all_services(
+    prompt: str, max_tokens: int = Config.MAX_TOKENS
+) -> Optional[Dict[str, str]]:
     """
-    Try all available AI services with fallback logic.
+    Try all available AI services with hedged fallback.
+
+    The first provider is fired immediately; each time `HEDGE_DELAY_MS` passes
+    without a response, the next provider is fired as a hedge. The first
+    successful answer wins and the remaining in-flight calls are cancelled,
+    turning tail latency from a sum of timeouts into the fastest provider's
+    latency. Setting `HEDGE_DELAY_MS` to 0 restores strict sequential fallback.
 
     Returns first successful response or `None` if all fail.
     """
-    services = []
+    logger.info(f"Trying {len(PROVIDERS)} service(s) in priority order")
 
-    if gemini_client:
-        services.append(("gemini", call_gemini))
-    if openai_client:
-        services.append(("openai", call_openai))
-    if groq_client:
-        services.append(("groq", call_groq))
+    if Config.HEDGE_DELAY_MS <= 0:
+        for service_name, service_call in PROVIDERS:
+            answer = await call_with_retries(service_name, service_call, prompt, max_tokens)
+            if answer:
+                return {"answer": answer.strip(), "model": service_name}
+        return None
 
-    logger.info(f"Trying {len(services)} service(s) in priority order")
+    hedge_delay = Config.HEDGE_DELAY_MS / 1000
+    pending_services = list(PROVIDERS)
+    tasks: Dict[asyncio.Task, str] = {}
 
-    for service_name, service_call in services:
+    try:
+        while tasks or pending_services:
+            if pending_services:
+                service_name, service_call = pending_services.pop(0)
+                logger.info(f"Attempting {service_name}...")
+                task = asyncio.create_task(
+                    call_with_retries(service_name, service_call, prompt, max_tokens)
+                )
+                tasks[task] = service_name
+
+            done, _ = await asyncio.wait(
+                tasks,
+                timeout=hedge_delay if pending_services else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                service_name = tasks.pop(task)
+                answer = task.result()
+                if answer:
+                    return {"answer": answer.strip(), "model": service_name}
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    return None
+
+
+# Transient errors worth retrying; anything else (400, auth, content policy)
+# fails the provider immediately so the fallback can move on.
+_RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    groq.RateLimitError,
+    groq.APITimeoutError,
+    groq.APIConnectionError,
+    groq.InternalServerError,
+    httpx.TimeoutException,
+    httpx.TransportError,
+    asyncio.TimeoutError,
+)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Return whether a provider error is transient (429/5xx/timeouts)."""
+    if isinstance(error, _RETRYABLE_ERRORS):
+        return True
+    # genai errors expose `code`; other SDK status errors expose `status_code`
+    status = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return False
+
+
+async def call_with_retries(
+    service_name: str, service_call, prompt: str, max_tokens: int = Config.MAX_TOKENS
+) -> Optional[str]:
+    """
+    Call one service with exponential backoff + full jitter.
+
+    Only transient errors are retried; non-retryable errors (bad request, auth,
+    content policy) fail the provider immediately. Returns `None` on failure.
+    """
+    for attempt in range(Config.MAX_RETRIES):
         try:
-            logger.info(f"Attempting {service_name}...")
-            for attempt in range(Config.MAX_RETRIES):
-                try:
-                    answer = service_call(prompt)
-                    if answer:
-                        return {
-                            "answer": answer.strip(),
-                            "model": service_name,
-                        }
-                except Exception as e:
-                    logger.warning(f"{service_name} attempt {attempt + 1} failed: {str(e)}")
-                    if attempt < Config.MAX_RETRIES - 1:
-                        time.sleep(Config.RETRY_DELAY * (attempt + 1))
-                    else:
-                        logger.error(f"{service_name} failed after {Config.MAX_RETRIES} attempts")
-                        break
+            answer = await service_call(prompt, max_tokens)
+            if answer:
+                return answer
         except Exception as e:
-            logger.error(f"{service_name} service error: {str(e)}")
-            continue
+            if not is_retryable_error(e):
+                logger.warning(f"{service_name} failed with non-retryable error: {str(e)}")
+                return None
+            logger.warning(f"{service_name} attempt {attempt + 1} failed: {str(e)}")
+            if attempt < Config.MAX_RETRIES - 1:
+                delay = min(Config.MAX_BACKOFF, 2 ** attempt) * random.random()
+                await asyncio.sleep(delay)
+            else:
+                logger.error(f"{service_name} failed after {Config.MAX_RETRIES} attempts")
 
     return None
 
 
-def call_gemini(prompt: str) -> Optional[str]:
+_BATCH_ANSWER_RE = re.compile(r"A(\d+):\s*(.*?)(?=\nA\d+:|\Z)", re.S)
+
+_BATCH_HEADER = (
+    "You will receive several numbered questions, each from a separate interviewer.\n"
+    "Answer each one independently in your usual style.\n"
+    "Format the output as one 'A<number>: <answer>' line per question, in order.\n\n"
+)
+
+
+class Batcher:
+    """
+    Micro-batch concurrent questions into a single LLM call.
+
+    Questions that arrive within the batching window are marshaled into one
+    numbered prompt ("Q1: ... Q2: ..."), sent as a single provider call, and
+    the numbered answers are demultiplexed back to the waiting callers. This
+    amortizes the system-prompt prefill across the batch and collapses N
+    requests into one against provider rate limits. A lone question is passed
+    through unchanged but still pays up to one batching window (default 20 ms)
+    waiting for company; set BATCH_WINDOW_MS=0 to opt out entirely.
+    """
+
+    def __init__(self, window: float, max_size: int):
+        self._window = window
+        self._max_size = max_size
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        # Strong refs to dispatch tasks; the loop itself only keeps weak ones,
+        # so an unreferenced task could be collected mid-flight and leave
+        # callers' futures unresolved.
+        self._inflight: set = set()
+
+    def start(self):
+        """Start the background batching loop."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the background batching loop."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, question: str) -> Optional[Dict[str, str]]:
+        """Queue a question and wait for its demultiplexed result."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((question, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self._max_size:
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=self._window))
+                except asyncio.TimeoutError:
+                    break
+            # Dispatch in its own task so the loop keeps collecting the next batch
+            self._spawn_dispatch(batch)
+
+    def _spawn_dispatch(self, batch):
+        task = asyncio.create_task(self._dispatch(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch):
+        if len(batch) == 1:
+            question, future = batch[0]
+            result = await try_all_services(build_full_prompt(question))
+            if not future.done():
+                future.set_result(result)
+            return
+
+        logger.info(f"Dispatching batch of {len(batch)} question(s)")
+        prompt = _BATCH_HEADER + "\n".join(
+            f"Q{i + 1}: {question}" for i, (question, _) in enumerate(batch)
+        )
+        # Scale the completion budget with the batch, otherwise the per-answer
+        # cap meant for one question truncates the later rows.
+        result = await try_all_services(prompt, max_tokens=Config.MAX_TOKENS * len(batch))
+
+        answers: Dict[int, str] = {}
+        if result:
+            answers = {
+                int(number): text.strip()
+                for number, text in _BATCH_ANSWER_RE.findall(result["answer"])
+            }
+
+        for i, (question, future) in enumerate(batch):
+            answer = answers.get(i + 1)
+            if answer:
+                row = {"answer": answer, "model": result["model"]}
+                if not future.done():
+                    future.set_result(row)
+            else:
+                # Row missing from the batched reply -- retry it individually
+                # rather than failing the caller.
+                self._spawn_dispatch([(question, future)])
+
+
+async def call_gemini(prompt: str, max_tokens: int = Config.MAX_TOKENS) -> Optional[str]:
     """Call Gemini API."""
     try:
-        response = gemini_client.models.generate_content(
+        response = await gemini_client.aio.models.generate_content(
             model=Config.GEMINI_MODEL,
-            contents=f"{SYSTEM_PROMPT}\n\n{prompt}"
+            contents=_GEMINI_PREFIX + prompt,
+            config=_gemini_config(max_tokens),
         )
 
         if response and response.text:
@@ -395,16 +848,13 @@ def call_gemini(prompt: str) -> Optional[str]:
         raise
 
 
-def call_openai(prompt: str) -> Optional[str]:
+async def call_openai(prompt: str, max_tokens: int = Config.MAX_TOKENS) -> Optional[str]:
     """Call OpenAI API."""
     try:
-        response = openai_client.chat.completions.create(
+        response = await openai_client.chat.completions.create(
             model=Config.OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=Config.MAX_TOKENS,
+            messages=[_SYSTEM_MSG, {"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
             temperature=Config.TEMPERATURE,
             timeout=Config.REQUEST_TIMEOUT,
         )
@@ -419,16 +869,13 @@ def call_openai(prompt: str) -> Optional[str]:
         raise
 
 
-def call_groq(prompt: str) -> Optional[str]:
+async def call_groq(prompt: str, max_tokens: int = Config.MAX_TOKENS) -> Optional[str]:
     """Call Groq API."""
     try:
-        response = groq_client.chat.completions.create(
+        response = await groq_client.chat.completions.create(
             model=Config.GROQ_MODEL,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=Config.MAX_TOKENS,
+            messages=[_SYSTEM_MSG, {"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
             temperature=Config.TEMPERATURE,
             timeout=Config.REQUEST_TIMEOUT,
         )
@@ -443,27 +890,104 @@ def call_groq(prompt: str) -> Optional[str]:
         raise
 
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log all incoming requests."""
-    start_time = time.time()
-    logger.info(f"{request.method} {request.url.path}")
+async def stream_all_services(prompt: str) -> AsyncIterator[str]:
+    """
+    Stream SSE events from the first provider that produces a token.
 
-    try:
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        logger.info(
-            f"{request.method} {request.url.path} "
-            f"- Status: {response.status_code} - Time: {process_time:.2f}s"
-        )
-        return response
-    except Exception as e:
-        process_time = time.time() - start_time
-        logger.error(
-            f"{request.method} {request.url.path} "
-            f"- Error: {str(e)} - Time: {process_time:.2f}s"
-        )
-        raise
+    Providers are tried in priority order; a provider that fails before its
+    first token is skipped. Once tokens are flowing, a mid-stream failure ends
+    the stream rather than switching models.
+    """
+    for service_name, service_stream in STREAM_PROVIDERS:
+        stream = service_stream(prompt)
+        try:
+            first_token = await anext(stream)
+        except StopAsyncIteration:
+            logger.warning(f"{service_name} stream produced no tokens")
+            continue
+        except Exception as e:
+            logger.warning(f"{service_name} stream failed to start: {str(e)}")
+            continue
+
+        yield f"data: {json.dumps({'token': first_token})}\n\n"
+        try:
+            async for token in stream:
+                yield f"data: {json.dumps({'token': token})}\n\n"
+        except Exception as e:
+            logger.error(f"{service_name} stream failed mid-response: {str(e)}")
+        yield f"data: {json.dumps({'done': True, 'model': service_name})}\n\n"
+        return
+
+    logger.error("All AI services failed to stream")
+    yield f"data: {json.dumps({'error': 'All AI services are currently unavailable.'})}\n\n"
+
+
+async def stream_gemini(prompt: str) -> AsyncIterator[str]:
+    """Stream tokens from the Gemini API."""
+    response = await gemini_client.aio.models.generate_content_stream(
+        model=Config.GEMINI_MODEL,
+        contents=_GEMINI_PREFIX + prompt,
+        config=_gemini_config(Config.MAX_TOKENS),
+    )
+    async for chunk in response:
+        if chunk.text:
+            yield chunk.text
+
+
+async def stream_openai(prompt: str) -> AsyncIterator[str]:
+    """Stream tokens from the OpenAI API."""
+    response = await openai_client.chat.completions.create(
+        model=Config.OPENAI_MODEL,
+        messages=[_SYSTEM_MSG, {"role": "user", "content": prompt}],
+        max_tokens=Config.MAX_TOKENS,
+        temperature=Config.TEMPERATURE,
+        timeout=Config.REQUEST_TIMEOUT,
+        stream=True,
+    )
+    async for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+async def stream_groq(prompt: str) -> AsyncIterator[str]:
+    """Stream tokens from the Groq API."""
+    response = await groq_client.chat.completions.create(
+        model=Config.GROQ_MODEL,
+        messages=[_SYSTEM_MSG, {"role": "user", "content": prompt}],
+        max_tokens=Config.MAX_TOKENS,
+        temperature=Config.TEMPERATURE,
+        timeout=Config.REQUEST_TIMEOUT,
+        stream=True,
+    )
+    async for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+if Config.LOG_REQUESTS:
+    # Duplicates uvicorn's access log with timings; opt-in because the extra
+    # middleware hop costs every request, including health checks.
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        """Log all incoming requests."""
+        start_time = time.time()
+        logger.info(f"{request.method} {request.url.path}")
+
+        try:
+            response = await call_next(request)
+            process_time = time.time() - start_time
+            logger.info(
+                f"{request.method} {request.url.path} "
+                f"- Status: {response.status_code} - Time: {process_time:.2f}s"
+            )
+            return response
+        except Exception as e:
+            process_time = time.time() - start_time
+            logger.error(
+                f"{request.method} {request.url.path} "
+                f"- Error: {str(e)} - Time: {process_time:.2f}s"
+            )
+            raise
 
 
 @app.exception_handler(HTTPException)
@@ -491,10 +1015,14 @@ async def general_exception_handler(request: Request, exc: Exception):
 if __name__ == "__main__":
     import uvicorn
 
+    dev_mode = os.getenv("ENV", "production").lower() == "dev"
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8001,
-        reload=True,
+        workers=1 if dev_mode else int(os.getenv("WORKERS", os.cpu_count() or 1)),
+        loop="uvloop",
+        http="httptools",
+        reload=dev_mode,
         log_level="info",
     )